@@ -2,12 +2,14 @@
 # A collection of functions to work with the database.
 
 # %% SET PATHS
+import atexit
 import base64
 from collections.abc import Callable
 import functools
 import json
 import os
 import sqlite3
+import threading
 from typing import Any
 import xml.etree.ElementTree as ET
 
@@ -24,8 +26,52 @@ DB_PATH = os.path.join(
     "requests_cache.db",
 )
 
+# The cache connection is shared across all decorated functions and threads -
+# opening a fresh connection per call redid the open/close and journal setup
+# every time. The lock serialises access, as sqlite connections are not safe
+# for concurrent use from multiple threads
+_CONN: sqlite3.Connection | None = None
+_CONN_LOCK = threading.Lock()
+
+# Commit cache inserts in batches of this many - each commit costs a journal
+# sync, and the inserts are only replayable cache entries, so losing the tail
+# of a batch on a crash just means refetching those requests
+_COMMIT_EVERY = 25
+_pending_writes = 0
+
 
 # %% FUNCTIONS
+def _flush_pending() -> None:
+    """Commit any cache inserts still pending on the shared connection."""
+    global _pending_writes  # noqa: PLW0603 - the batch counter is module state on purpose
+    if _CONN is not None and _pending_writes:
+        with _CONN_LOCK:
+            _CONN.commit()
+            _pending_writes = 0
+
+
+# Make sure the tail of the last batch reaches the database when python exits
+atexit.register(_flush_pending)
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Return the shared cache connection, opening it on first use.
+
+    WAL mode lets readers proceed alongside the writer and NORMAL synchronous
+    skips an fsync per commit, which is safe under WAL.
+
+    Returns:
+        sqlite3.Connection: The shared connection to the cache database.
+    """
+    global _CONN  # noqa: PLW0603 - the shared connection is module state on purpose
+    if _CONN is None:
+        _CONN = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _CONN.execute("PRAGMA journal_mode=WAL")
+        _CONN.execute("PRAGMA synchronous=NORMAL")
+        _CONN.execute("PRAGMA temp_store=MEMORY")
+    return _CONN
+
+
 def _detect_format(content_type: str | None) -> str:
     """Detect the format of a content type.
 
@@ -177,17 +223,20 @@ def db_cache(func: Callable) -> Callable:
         Returns:
             Any: The result of the request.
         """
+        global _pending_writes  # noqa: PLW0603 - the batch counter is module state on purpose
         fname = func.__name__
 
         # Check if the result for this request is in the cache
         if not force_refresh:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT body, format, content_type, encoding, status_code, headers FROM cache WHERE request=?",
-                (request,),
-            )
-            row = cursor.fetchone()
+            with _CONN_LOCK:
+                row = (
+                    _get_conn()
+                    .execute(
+                        "SELECT body, format, content_type, encoding, status_code, headers FROM cache WHERE request=?",
+                        (request,),
+                    )
+                    .fetchone()
+                )
             if row:
                 body, fmt, content_type, encoding, status_code, headers_json = row
                 if return_as == "response":
@@ -195,8 +244,6 @@ def db_cache(func: Callable) -> Callable:
                         request, body, fmt, status_code, headers_json, encoding
                     )
                 return _deserialize_to_object(body, fmt)
-            conn.commit()
-            conn.close()
 
         # No return from cache, call underlying function
         result = func(request, *args, **kwargs)
@@ -216,27 +263,29 @@ def db_cache(func: Callable) -> Callable:
         body, fmt = _serialize_result(result, content_type, encoding)
 
         # Insert into cache
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT OR REPLACE INTO cache
-            (request, func_name, body, format, content_type, encoding, status_code, headers, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """,
-            (
-                request,
-                fname,
-                body,
-                fmt,
-                content_type,
-                encoding,
-                status_code,
-                headers_json,
-            ),
-        )
-        conn.commit()
-        conn.close()
+        with _CONN_LOCK:
+            conn = _get_conn()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cache
+                (request, func_name, body, format, content_type, encoding, status_code, headers, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+                (
+                    request,
+                    fname,
+                    body,
+                    fmt,
+                    content_type,
+                    encoding,
+                    status_code,
+                    headers_json,
+                ),
+            )
+            _pending_writes += 1
+            if _pending_writes >= _COMMIT_EVERY:
+                conn.commit()
+                _pending_writes = 0
 
         # Return the appropriate object
         if return_as == "response":
@@ -9,6 +9,7 @@ from time import sleep
 
 from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
 from .dbfuncs import db_cache
 from .utils import get_parsed_date, ttl_cache
@@ -18,10 +19,27 @@ MB_ROOT = "https://musicbrainz.org/ws/2/"
 LASTFM_ROOT = "https://ws.audioscrobbler.com/2.0/"
 GENIUS_ROOT = "http://api.genius.com/"
 
+# Responses worth retrying with backoff - rate limits and server hiccups
+RETRY_STATUSES = {429, 500, 502, 503}
+
+# One session for all requests, so the TCP+TLS connections are kept alive and
+# reused between calls instead of a fresh handshake per request. The adapter
+# also retries with backoff when rate limited or the server hiccups
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=5, backoff_factor=1.5, status_forcelist=RETRY_STATUSES),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
 
 # %% FUNCTIONS
 @db_cache
-def fetch(url: str, backoff: float = 1.5) -> requests.Response:
+def fetch(
+    url: str, backoff: float = 1.5, headers: dict | None = None
+) -> requests.Response:
     """Fetch a URL and return the response.
 
     With db_cache, this will either retrieve
@@ -30,13 +48,15 @@ def fetch(url: str, backoff: float = 1.5) -> requests.Response:
     Args:
         url (str): The url to request.
         backoff (float, optional): The time to wait between requests. Defaults to 1.5.
+        headers (dict | None, optional): Headers to send with the request, e.g. an
+            API key. Note that they are not part of the cache key. Defaults to None.
 
     Returns:
         requests.Response: The response.
     """
     # Don't hammer the server. 1 request per second is a safe assumption
     sleep(backoff)
-    return requests.get(url, timeout=30)
+    return SESSION.get(url, timeout=30, headers=headers)
 
 
 def get_artist_info(artist_name: str, **kwargs) -> dict:
@@ -237,7 +257,7 @@ def get_spotify_access_token(spotify_client_id: str, spotify_client_secret: str)
     }
     data = {"grant_type": "client_credentials"}
 
-    resp = requests.post(auth_url, headers=headers, data=data)
+    resp = SESSION.post(auth_url, headers=headers, data=data)
     resp.raise_for_status()
     return resp.json()["access_token"]
 
@@ -264,7 +284,7 @@ def get_spotify_artist(
     headers = {"Authorization": f"Bearer {token}"}
     params = {"q": artist_name, "type": "artist", "limit": 1}
 
-    resp = requests.get(search_url, headers=headers, params=params)
+    resp = SESSION.get(search_url, headers=headers, params=params)
     resp.raise_for_status()
     artist_info = [
         artist
@@ -310,7 +330,7 @@ def get_spotify_followers_and_listeners(
 
     # Get artist's Spotify browser page
     url = f"https://open.spotify.com/artist/{artist_spotify_id}"
-    resp = requests.get(url)
+    resp = SESSION.get(url)
     sleep(1.5)  # Sleep to avoid hammering the server
 
     # Extract followers and listeners
@@ -350,10 +370,12 @@ def get_spotify_followers_and_listeners(
     return artist_spotify_listeners_and_followers
 
 
-@cache
-def get_setlists(artist: str, setlistfm_api_key: str, page: int = 1) -> dict:
+def get_setlists(artist: str, setlistfm_api_key: str, page: int = 1, **kwargs) -> dict:
     """Get setlists for an artist from Setlist.fm.
 
+    The pages go through fetch, so they are cached on disk and survive process
+    restarts, unlike the in-memory cache this used before.
+
     Args:
         artist (str): The name of the artist.
         setlistfm_api_key (str): The Setlist.fm API key.
@@ -365,9 +387,7 @@ def get_setlists(artist: str, setlistfm_api_key: str, page: int = 1) -> dict:
     headers = {"x-api-key": setlistfm_api_key, "Accept": "application/json"}
     mbid = get_artist_mbid(artist)
     url = f"https://api.setlist.fm/rest/1.0/artist/{mbid}/setlists?p={page}"
-    response = requests.get(url, headers=headers)
-    sleep(1.5)  # Sleep to avoid hammering the server
-    return response.json()
+    return fetch(url, headers=headers, **kwargs)
 
 
 def get_artist_songs(
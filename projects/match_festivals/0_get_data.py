@@ -3,12 +3,16 @@
 
 # %% IMPORTS
 import json
+import pathlib
 import re
 from time import sleep
 
 from mullpy import switch_mullvad_random_server
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as ec
+from selenium.webdriver.support.ui import WebDriverWait
 from tqdm import tqdm
 
 # %% INPUTS
@@ -18,6 +22,9 @@ year_end = 2025
 
 
 # %% FUNCTIONS AND SUCH
+# Festivals are checkpointed here one JSON line at a time while scraping
+checkpoint_path = pathlib.Path("../../data/festivals.jsonl")
+
 regex_next_event = re.compile(
     r'next:\s*<a\s+href="(?P<next_url>concert_[^"]+?)"',  # Mention of next event and url
     re.IGNORECASE,
@@ -29,21 +36,46 @@ regex_history = re.compile(
 
 # %%
 # Get all festivals in the given years
-# Start browser
-driver = webdriver.Chrome()
+# Start browser. Only the HTML is parsed, so run headless and skip downloading
+# images, stylesheets and fonts - most of the bytes on these pages
+options = webdriver.ChromeOptions()
+options.add_argument("--headless=new")
+options.add_argument("--blink-settings=imagesEnabled=false")
+options.add_experimental_option(
+    "prefs",
+    {
+        "profile.managed_default_content_settings": {
+            "images": 2,
+            "stylesheets": 2,
+            "fonts": 2,
+        }
+    },
+)
+driver = webdriver.Chrome(options=options)
 
 festivals = []
 for year in range(2022, year_end + 1):
-    # Open concerts-metal.com page for festivals of the given year
+    # Open concerts-metal.com page for festivals of the given year. Wait until
+    # the festival divs are actually there instead of a fixed sleep, then pause
+    # briefly to not hammer the server
     driver.get(f"https://en.concerts-metal.com/festivals-{year}.html")
-    sleep(2)  # Wait for page to load and don't hammer the server
-
-    # Find all festivals - this is a list of divs with class d-xl-none
-    festival_elements = driver.find_elements(By.CLASS_NAME, "d-xl-none")
-
-    for festival_element in festival_elements:
-        festival_html_text = festival_element.get_attribute("innerHTML")
-
+    try:
+        WebDriverWait(driver, 10).until(
+            ec.presence_of_element_located((By.CSS_SELECTOR, "div.d-xl-none"))
+        )
+    except TimeoutException:
+        # No festival divs showed up - fall through and scrape what is there
+        print(f"No festivals found for {year} within the wait")
+    sleep(1)
+
+    # Find all festivals - this is a list of divs with class d-xl-none. Extract all
+    # their htmls with one script call instead of one WebDriver round-trip each
+    festival_htmls = driver.execute_script(
+        "return Array.from(document.querySelectorAll('div.d-xl-none'))"
+        ".map(e => e.innerHTML);"
+    )
+
+    for festival_html_text in festival_htmls:
         # Quick and dirty parsing (I know, regex is nice, but this is apparently more robust)
         # Find mouse over text which contains details
         festival_details = festival_html_text.split('<a title="')[1].split('" href="')[
@@ -72,12 +104,20 @@ for year in range(2022, year_end + 1):
         festivals.append(festival_info)
 
 ##### Scrape festival details #####
+# Get urls of festivals that were already scraped in a previous (partial) run, so
+# a crash or relay failure only costs the progress since the last festival
+done_urls = set()
+if checkpoint_path.exists():
+    with open(checkpoint_path, encoding="utf-8") as f:
+        done_urls = {json.loads(line)["url"] for line in f}
+
 # Counter for switching Mullvad relays
 i = 0
 # Get all artists at found festivals
+f_out = open(checkpoint_path, "a", encoding="utf-8")
 for festival in tqdm(festivals, desc="Getting artists at festivals"):
     # If already scraped, skip
-    if festival.get("artists"):
+    if festival["url"] in done_urls:
         continue
 
     # Switch to a random Mullvad relay every 100 requests
@@ -87,17 +127,27 @@ for festival in tqdm(festivals, desc="Getting artists at festivals"):
         sleep(5)  # Wait for relay to switch
         i = 0
 
-    # Go to festival page and scrape
+    # Go to festival page and scrape. Wait until the lineup table rows are
+    # there instead of a fixed sleep, then pause briefly to not hammer the
+    # server
     driver.get(f"https://en.concerts-metal.com/{festival['url']}")
-    sleep(2)  # Wait for page to load and don't hammer the server
-
-    # Get each <tr> in the table
-    artists_elements = driver.find_elements(By.XPATH, "//tr")
+    try:
+        WebDriverWait(driver, 10).until(
+            ec.presence_of_element_located((By.CSS_SELECTOR, "tr"))
+        )
+    except TimeoutException:
+        # Some festival pages have no lineup table at all - fall through, which
+        # yields an empty artist list and still checkpoints the festival
+        pass
+    sleep(1)
+
+    # Get each <tr> in the table, again with a single script call per page
+    artist_htmls = driver.execute_script(
+        "return Array.from(document.querySelectorAll('tr')).map(e => e.outerHTML);"
+    )
 
     artists = []
-    for artist_element in artists_elements:
-        artist_html_text = artist_element.get_attribute("outerHTML")
-
+    for artist_html_text in artist_htmls:
         # Get artist url
         try:
             artist_url = artist_html_text.split('" href="')[1].split('">')[0]
@@ -136,9 +186,16 @@ for festival in tqdm(festivals, desc="Getting artists at festivals"):
 
     festival["artists"] = artists
 
+    # Checkpoint immediately so the festival survives a crash
+    f_out.write(json.dumps(festival) + "\n")
+    f_out.flush()
+
+f_out.close()
 driver.quit()
 
-# Store for later use
+# Consolidate the checkpoint into a single json for the downstream scripts
+with open(checkpoint_path, encoding="utf-8") as f:
+    festivals = [json.loads(line) for line in f]
 with open("../../data/festivals.json", "w", encoding="utf-8") as f:
     json.dump(festivals, f)
 
@@ -4,20 +4,20 @@
 # extension to run the code as code cells separated by # %%
 
 # %% IMPORTS
-import json
-
 from festival_recommender import FestivalRecommender
+import ijson
 
 # %%
-# Load data (put your own data there)
-with open("../../data/festivals.json", encoding="utf-8") as f:
-    festivals = json.load(f)
-
-# Prep data for recommender, only keep festivals with more than one artist
-festivals = {
-    festival["name"]: [artist["name"] for artist in festival["artists"]]
-    for festival in festivals
-}
+# Load data (put your own data there). Stream the JSON array so the raw festival
+# dicts are never all in memory at once, and shape it for the recommender in the
+# same pass, only keeping festivals with more than one artist
+festivals = {}
+with open("../../data/festivals.json", "rb") as f:
+    for festival in ijson.items(f, "item"):
+        if len(festival["artists"]) > 1:
+            festivals[festival["name"]] = [
+                artist["name"] for artist in festival["artists"]
+            ]
 
 # Initialise recommender and mine rules
 recommender = FestivalRecommender()
@@ -29,8 +29,8 @@ recommender = FestivalRecommender.load("../../data/match_festivals_rules_large.p
 
 # %%
 # Recommend festivals
-recommendations = recommender.recommend_festivals("Kanonenfieber")
-for festival, score in recommendations[:10]:
+recommendations = recommender.recommend_festivals("Kanonenfieber", top_k=10)
+for festival, score in recommendations:
     print(f"{festival}: score {score:.2f}")
 
 # %%
@@ -3,19 +3,20 @@
 
 # %% IMPORTS
 from collections import Counter, defaultdict
-from itertools import chain
+from itertools import chain, combinations
 import json
 
 from matplotlib import ticker
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
+from scipy import sparse
 
 # %% INPUTS
 artist_of_interest = "Insomnium"
 top_n = 25
 genre_of_interest = ""  # 'Melodic Death Metal'
+annot_max_cells = 400  # Annotate heatmap cells only up to this many cells
 
 # %% GET DATA
 # Load data
@@ -45,35 +46,63 @@ top_performers = Counter(
 )
 
 # Collect artists that have performed at the same festival (festival twins), as long
-# as one of the artists is in the genre of interest
-festival_twins = defaultdict(lambda: {"festivals": [], "count": 0})
-for festival in festivals:
-    for artist in festival["artists"]:
-        for other_artist in festival["artists"]:
-            # Skip artists that have no url - they are probably very early in their career
-            if not artist["url"] or not other_artist["url"]:
-                continue
-            # Only keep twins if at least one of the artists is in the genre of interest
-            if genre_of_interest:
-                if not genre_of_interest in (artist["genre"], other_artist["genre"]):
-                    continue
-            # Add alphabetically ordered pairs to avoid reciprocal pairs
-            if artist["name"] < other_artist["name"]:
-                artists = (artist["name"], other_artist["name"])
-                festival_twins[artists]["festivals"].append(festival["name"])
-                festival_twins[artists]["count"] += 1
+# as one of the artists is in the genre of interest. Build a binary festival x artist
+# matrix and count all co-appearances with one sparse matrix multiply, instead of
+# looping over every artist pair of every festival in Python
+# Skip artists that have no url - they are probably very early in their career
+lineups = [
+    [artist["name"] for artist in festival["artists"] if artist["url"]]
+    for festival in festivals
+]
+artist_names = sorted(set(chain.from_iterable(lineups)))
+artist_idx = {name: i for i, name in enumerate(artist_names)}
+
+rows = [fi for fi, lineup in enumerate(lineups) for _ in lineup]
+cols = [artist_idx[name] for lineup in lineups for name in lineup]
+M = sparse.csr_matrix(
+    (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+    shape=(len(lineups), len(artist_names)),
+)
 
-# Get only artists that have performed at more than one festival and sort
-top_festival_twins = {
-    artists: festivals["count"]
-    for artists, festivals in festival_twins.items()
-    if festivals["count"] > 1
+# The upper triangle of the co-occurrence matrix holds each pair exactly once,
+# already in alphabetical order since the artist names are sorted
+C = sparse.triu(M.T @ M, k=1).tocoo()
+
+# Artists in the genre of interest, for filtering the pairs
+genre_artists = {
+    name for name, genre in artist_genres.items() if genre == genre_of_interest
 }
 
+# A plain Counter for the pair counts - the old dict-of-dicts allocated a fresh
+# dict and list per pair, and tracked the count separately from the attribution
+twin_counts = Counter()
+for i, j, count in zip(C.row, C.col, C.data, strict=True):
+    pair = (artist_names[i], artist_names[j])
+    # Only keep twins if at least one of the artists is in the genre of interest
+    if genre_of_interest and not genre_artists.intersection(pair):
+        continue
+    twin_counts[pair] = int(count)
+
+# Keep the per-pair festival attribution for reference. combinations yields each
+# alphabetical pair exactly once, instead of iterating the full artist product and
+# discarding half of it
+twin_festivals = defaultdict(list)
+for festival, lineup in zip(festivals, lineups, strict=True):
+    for pair in combinations(sorted(set(lineup)), 2):
+        if pair in twin_counts:
+            twin_festivals[pair].append(festival["name"])
+
+# Get only artists that have performed at more than one festival and sort
+top_festival_twins = {pair: count for pair, count in twin_counts.items() if count > 1}
+
+# Sort the performer counts once - most_common sorts the full Counter each
+# time it is called, and both plots below only need a slice of the same order
+top_performers_ordered = top_performers.most_common()
+
 # %% VISUALISE
 ##### Top festival twins #####
 # Get top 10 artists
-top_10_artists = [artist for artist, _ in top_performers.most_common(10)]
+top_10_artists = [artist for artist, _ in top_performers_ordered[:10]]
 
 # Initialize symmetric matrix
 matrix = pd.DataFrame(0, index=top_10_artists, columns=top_10_artists)
@@ -87,32 +116,36 @@ for (a, b), count in top_festival_twins.items():
 # Mask the diagonal (top left to bottom right)
 mask = np.eye(len(matrix), dtype=bool)
 
-# Plot
-plt.figure(figsize=(10, 8))
-sns.heatmap(
-    matrix,
-    mask=mask,
-    annot=True,
-    fmt="d",
-    cmap="Blues",
-    linewidths=0.5,
-    linecolor="grey",
-)
+# Plot with imshow - a single image blit, where a seaborn heatmap draws a patch
+# per cell. Per-cell annotations dominate render time, so skip them on big matrices
+annot = matrix.size <= annot_max_cells
+
+fig, ax = plt.subplots(figsize=(10, 8))
+im = ax.imshow(np.ma.masked_where(mask, matrix.values), cmap="Blues", aspect="auto")
+
+# Annotate the cells when the matrix is small enough
+if annot:
+    for i in range(matrix.shape[0]):
+        for j in range(matrix.shape[1]):
+            if not mask[i, j]:
+                ax.text(j, i, int(matrix.iat[i, j]), ha="center", va="center")
 
 # Force integer ticks on colorbar
-cbar = plt.gca().collections[0].colorbar
+cbar = fig.colorbar(im, ax=ax)
 cbar.ax.yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
 
 # Labels and layout
-plt.title("Shared lineups between top performing artists between 2022 and 2025")
-plt.xticks(rotation=45, fontname="DejaVu Sans Mono")
-plt.yticks(rotation=0, fontname="DejaVu Sans Mono")
+ax.set_title("Shared lineups between top performing artists between 2022 and 2025")
+ax.set_xticks(range(len(matrix.columns)))
+ax.set_xticklabels(matrix.columns, rotation=45, fontname="DejaVu Sans Mono")
+ax.set_yticks(range(len(matrix.index)))
+ax.set_yticklabels(matrix.index, rotation=0, fontname="DejaVu Sans Mono")
 plt.tight_layout()
 plt.show()
 
 # %%
 ##### Top performers in genre of interest #####
-top_performers_sorted = top_performers.most_common(top_n)
+top_performers_sorted = top_performers_ordered[:top_n]
 
 # Extract labels and counts
 labels = [artist for artist, _ in top_performers_sorted]
@@ -2,6 +2,7 @@
 
 # %% IMPORTS
 from collections import defaultdict
+import heapq
 from itertools import chain
 from math import ceil
 import pickle
@@ -11,10 +12,77 @@ import re
 from loguru import logger
 import matplotlib.pyplot as plt
 from mlxtend.frequent_patterns import association_rules, fpgrowth
-from mlxtend.preprocessing import TransactionEncoder
 import networkx as nx
+import numpy as np
 import pandas as pd
-from sklearn.metrics import jaccard_score
+from scipy import sparse
+
+try:  # Numba is optional - without it the similarity maths falls back to plain NumPy
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    prange = range
+    NUMBA_AVAILABLE = False
+
+try:  # pyfim is optional - its C implementation of fpgrowth mines frequent
+    # itemsets orders of magnitude faster than mlxtend on large sparse sets
+    from fim import fpgrowth as fim_fpgrowth
+
+    PYFIM_AVAILABLE = True
+except ImportError:
+    PYFIM_AVAILABLE = False
+
+
+# %% CONSTANTS
+# Matches a trailing year in a festival name, e.g. "Wacken Open Air 2024"
+_YEAR_SUFFIX = re.compile(r"\s\d{4}$")
+
+
+# %% FUNCTIONS
+def _popcount(value: np.uint64) -> int:
+    """Count the set bits in a 64-bit word (Kernighan's method).
+
+    Args:
+        value (np.uint64): The word to count bits in.
+
+    Returns:
+        int: The number of set bits.
+    """
+    count = 0
+    while value:
+        value &= value - np.uint64(1)
+        count += 1
+    return count
+
+
+def _jaccard_matrix(bits: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Calculate the pairwise Jaccard similarity for packed artist bitsets.
+
+    Args:
+        bits (np.ndarray): uint64 matrix of shape (artists, words), each row the
+            packed binary festival vector of one artist.
+        counts (np.ndarray): Number of festival appearances per artist.
+
+    Returns:
+        np.ndarray: Similarities of shape (artists, artists), upper triangle only.
+    """
+    n_artists, n_words = bits.shape
+    out = np.zeros((n_artists, n_artists), dtype=np.float64)
+    for i in prange(n_artists):
+        for j in range(i + 1, n_artists):
+            inter = 0
+            for k in range(n_words):
+                inter += _popcount(bits[i, k] & bits[j, k])
+            union = counts[i] + counts[j] - inter
+            if union > 0:
+                out[i, j] = inter / union
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _popcount = njit(cache=True)(_popcount)
+    _jaccard_matrix = njit(parallel=True, cache=True)(_jaccard_matrix)
 
 
 # %% CLASS
@@ -44,6 +112,12 @@ class FestivalRecommender:
         self.frequent_itemsets: pd.DataFrame = pd.DataFrame()
         self.rules: pd.DataFrame = pd.DataFrame()
         self.mining_settings: dict = {}
+        self._artist_festivals: dict = {}
+        self._antecedent_index: dict = {}
+        self._festival_base: dict = {}
+        self._matrix: sparse.csr_matrix | None = None
+        self._artists: list = []
+        self._artist_idx: dict = {}
 
     def save(self, path: str) -> None:
         """Save object to a pickle file.
@@ -116,48 +190,69 @@ class FestivalRecommender:
             if len(artists) > 1
         }
 
-        # Get lineup, festival names and artists
+        # Get lineup and festival names. Materialise the lineups once - they are
+        # consumed again below, by pyfim when it is installed
         self.festival_names = list(self.festivals.keys())
-        lineups = self.festivals.values()
-        artists = set(chain.from_iterable(lineups))
+        lineups = list(self.festivals.values())
+
+        # Encode all lineups into a binary sparse matrix directly - a dense
+        # intermediate would allocate festivals x artists bytes of mostly zeros
+        # before being cast back column by column. The matrix is cached on the
+        # instance so the scoring methods can reuse it; reset it first so a stale
+        # matrix from a previous mine_rules call is not reused for the new data
+        logger.info("Construct sparse dataframe from lineups")
+        self._matrix = None
+        matrix = self._get_matrix()
+        artists = self._artists
         logger.info(
             f"Found {len(lineups):,} lineups containing {len(artists):,} artists"
         )
 
-        # Encode all lineups into a binary matrix
-        logger.info("Construct sparse dataframe from lineups")
-        te = TransactionEncoder()
-        te_array = te.fit(lineups).transform(lineups)
-        df = pd.DataFrame(te_array, columns=te.columns_)
-
         # Remove artists that will not be in any rules as they are not in enough lineups
         # Calculate min support from minimum number of lineups artists need to shares
-        min_support = min_support_n / len(df)
+        min_support = min_support_n / matrix.shape[0]
 
         # Calculate number of lineups artists need to share from min_support
         min_lineups = ceil(min_support * len(lineups))
         logger.info(f"Look for paired artists in at least {min_lineups} lineups")
 
-        artist_counts = df.sum(axis=0)
-        df = df.loc[:, artist_counts >= min_lineups]
+        keep = np.asarray(matrix.sum(axis=0)).ravel() >= min_lineups
+        df = pd.DataFrame.sparse.from_spmatrix(
+            matrix[:, keep],
+            columns=[a for a, k in zip(artists, keep, strict=True) if k],
+        )
         logger.info(
             f"Found {df.shape[0]:,} lineups with {df.shape[1]:,} artists after cleaning"
         )
 
-        # Convert to sparse to be kinder on memory
-        df = df.astype(pd.SparseDtype("bool", fill_value=False))
-
         self.mining_settings = {
             "min_support": min_support,
             "min_support_n": min_support_n,
             "max_rule_length": max_rule_length,
         }
 
-        # Use fpgrowth as it works with large sparse matrices better
+        # Use fpgrowth as it works with large sparse matrices better. Prefer the
+        # C implementation from pyfim when it is installed; the rule generation
+        # below works on the frequent itemsets either way
         logger.info("Find frequent itemsets")
-        self.frequent_itemsets = fpgrowth(
-            df, min_support=min_support, use_colnames=True, max_len=max_rule_length
-        )
+        if PYFIM_AVAILABLE:
+            # pyfim takes the raw transactions; supp is a percentage and report
+            # "s" adds the relative support to each itemset
+            itemsets = fim_fpgrowth(
+                lineups,
+                supp=min_support * 100,
+                zmax=max_rule_length,
+                target="s",
+                report="s",
+            )
+            self.frequent_itemsets = pd.DataFrame({
+                "support": [support for _, support in itemsets],
+                "itemsets": [frozenset(itemset) for itemset, _ in itemsets],
+            })
+        else:
+            self.frequent_itemsets = fpgrowth(
+                df, min_support=min_support, use_colnames=True, max_len=max_rule_length
+            )
         logger.info(f"Found {len(self.frequent_itemsets)} frequent itemsets")
 
         # Generate the association rules
@@ -167,12 +262,103 @@ class FestivalRecommender:
         )
         logger.info(f"Created {len(self.rules)} rules")
 
+        # Build the inverted indexes for fast co-appearance and rule lookups
+        self._build_artist_index()
+        self._build_antecedent_index()
+        self._build_festival_base()
+
+    def _build_matrix(self) -> None:
+        """Build and cache the binary festival-artist matrix from the festivals."""
+        lineups = self.festivals.values()
+        self._artists = sorted(set(chain.from_iterable(lineups)))
+        self._artist_idx = {artist: i for i, artist in enumerate(self._artists)}
+        rows = [fi for fi, lineup in enumerate(lineups) for _ in lineup]
+        cols = [self._artist_idx[artist] for lineup in lineups for artist in lineup]
+        self._matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=bool), (rows, cols)),
+            shape=(len(self.festivals), len(self._artists)),
+        )
+
+    def _get_matrix(self) -> sparse.csr_matrix:
+        """Return the cached festival-artist matrix, building it if missing.
+
+        The getattr guard covers recommenders pickled before the cache existed.
+
+        Returns:
+            sparse.csr_matrix: The binary festival-artist matrix.
+        """
+        if getattr(self, "_matrix", None) is None:
+            self._build_matrix()
+        return self._matrix
+
+    def _build_artist_index(self) -> None:
+        """Build the inverted index from artist to the festivals they played."""
+        self._artist_festivals = defaultdict(set)
+        for festival, lineup in self.festivals.items():
+            for artist in lineup:
+                self._artist_festivals[artist].add(festival)
+
+    def _build_antecedent_index(self) -> None:
+        """Build the index from antecedent artist to (consequents, lift) pairs."""
+        self._antecedent_index = defaultdict(list)
+        for rule in self.rules[["antecedents", "consequents", "lift"]].itertuples():
+            for antecedent in rule.antecedents:
+                self._antecedent_index[antecedent].append((rule.consequents, rule.lift))
+
+    def _build_festival_base(self) -> None:
+        """Cache the year-stripped base name of each festival edition."""
+        self._festival_base = {
+            name: _YEAR_SUFFIX.sub("", name) for name in self.festival_names
+        }
+
+    def _aggregate_scores(
+        self, scored: list, artist: str, exclude_played: bool
+    ) -> list:
+        """Average the raw edition scores per festival base name.
+
+        Args:
+            scored (list): Tuples of festival edition name and raw score.
+            artist (str): The artist the scores are for.
+            exclude_played (bool): If festivals the artist has already played at
+                should be excluded.
+
+        Returns:
+            list: Tuples of festival base name and average score, unordered.
+        """
+        # Remove year from festival names, from the cached base name mapping
+        # instead of running the regex on every call
+        if not getattr(self, "_festival_base", None):
+            self._build_festival_base()
+        scored = [(self._festival_base[festival], score) for festival, score in scored]
+
+        # Remove festivals the artist already played if asked, taken from the
+        # inverted festival index
+        if exclude_played:
+            if not getattr(self, "_artist_festivals", None):
+                self._build_artist_index()
+            played_festivals = {
+                self._festival_base[festival]
+                for festival in self._artist_festivals.get(artist, ())
+            }
+            scored = [
+                (festival, score)
+                for festival, score in scored
+                if festival not in played_festivals
+            ]
+
+        # Calculate average score per festival
+        scores = defaultdict(list)
+        for name, score in scored:
+            scores[name].append(score)
+        return [(name, sum(vals) / len(vals)) for name, vals in scores.items()]
+
     def recommend_festivals(
         self,
         artist: str,
         min_lift: float = 1.0,
         exclude_played: bool = True,
         return_raw: bool = False,
+        top_k: int | None = None,
     ) -> list:
         """Find festivals where an artist would fit in the lineup.
 
@@ -193,60 +379,48 @@ class FestivalRecommender:
                 at should be excluded. Defaults to True.
             return_raw (bool, optional): Returns the raw calculation results and does
                 not aggregate festival editions. Defaults to False.
+            top_k (int | None, optional): Only return the k best recommendations.
+                Defaults to None, which returns all of them.
 
         Returns:
             list: The recommended festivals with the score.
         """
-        # Get co appearing artists from rules
-        co_artists = set().union(
-            *self.rules[
-                self.rules["antecedents"].apply(lambda x: artist in x)
-                & (self.rules["lift"] >= min_lift)
-            ]["consequents"]
-        )
-
-        # Score each festival by overlap with co-performers
-        scored = []
-        for festival, artists in self.festivals.items():
-            score = len(set(artists) & co_artists)
-            scored.append((festival, score))
+        # Get co appearing artists from the antecedent index - an O(1) lookup of
+        # the artist's rules instead of a membership scan over all of them
+        if not getattr(self, "_antecedent_index", None):
+            self._build_antecedent_index()
+        co_artists = set()
+        for consequents, lift in self._antecedent_index.get(artist, []):
+            if lift >= min_lift:
+                co_artists |= consequents
+
+        # Score each festival by lineup overlap with the co-performers in a single
+        # sparse matrix-vector product, rather than a set intersection per festival
+        matrix = self._get_matrix()
+        co_vector = np.zeros(matrix.shape[1], dtype=np.int32)
+        co_vector[
+            [self._artist_idx[a] for a in co_artists if a in self._artist_idx]
+        ] = 1
+        scores = matrix @ co_vector
+        scored = list(zip(self.festival_names, scores.tolist(), strict=True))
 
         # Return raw results if asked, otherwise aggregate
         if return_raw:
             return scored
 
         ### Tidy up ###
-        # Remove year from festival names
-        scored = [
-            (re.sub(r"\s\d{4}$", "", festival), score) for festival, score in scored
-        ]
-
-        # Identify festivals the artist already played if asked
-        if exclude_played:
-            played_festivals = {
-                re.sub(r"\s\d{4}$", "", festival)
-                for festival, artists in self.festivals.items()
-                if artist in artists
-            }
-            scored = [
-                (festival, score)
-                for festival, score in scored
-                if festival not in played_festivals
-            ]
-
-        # Calculate average score per festival
-        scores = defaultdict(list)
-        for name, score in scored:
-            scores[name].append(score)
-        recommendations = [
-            (name, sum(vals) / len(vals)) for name, vals in scores.items()
-        ]
+        # Strip the years off, drop played festivals and average per festival
+        recommendations = self._aggregate_scores(scored, artist, exclude_played)
 
-        # Remove zero scores and sort
+        # Remove zero scores and sort. For a top-k request a partial heap sort
+        # beats sorting the full list
         recommendations = [
             (name, score) for name, score in recommendations if score > 0
         ]
-        recommendations.sort(key=lambda x: x[1], reverse=True)
+        if top_k is not None:
+            recommendations = heapq.nlargest(top_k, recommendations, key=lambda x: x[1])
+        else:
+            recommendations.sort(key=lambda x: x[1], reverse=True)
 
         # Make an explicit note if no recommendations are found
         if not recommendations:
@@ -282,41 +456,54 @@ class FestivalRecommender:
             figsize (tuple, optional): Plot figure size. Defaults to (16, 16).
             title (str, optional): Plot title.
         """
-        # Build binary artist-festival matrix from self.festivals
+        # Get the cached binary artist-festival matrix, building it if needed. This
+        # replaces the old dense wide DataFrame construction, which peaked at
+        # festivals x artists memory before being cast back to sparse
         logger.info(
             f"Building binary artist-festival matrix with {len(self.festivals)} festivals"
         )
-        df = (
-            pd.DataFrame(
-                [
-                    {artist: 1 for artist in lineup}
-                    for lineup in self.festivals.values()
-                ],
-                index=self.festival_names,
-            )
-            .fillna(0)
-            .astype("Sparse[int]")
-        )
+        matrix = self._get_matrix()
+
+        # Get the top artists by number of festival appearances
+        appearances = np.asarray(matrix.sum(axis=0)).ravel()
+        top_idx = np.argsort(appearances)[::-1][:top_n]
+        top_artists = [self._artists[i] for i in top_idx]
 
-        top_artists = (
-            df.sum(axis=0).sort_values(ascending=False).head(top_n).index.tolist()
-        )
         G = nx.Graph()
 
         # Add nodes
         for artist in top_artists:
             G.add_node(artist)
 
-        # Add edges based on Jaccard similarity
+        # Densify only the top artist columns, in one block conversion - doing this
+        # per pair in the loop below would re-densify every column N-1 times
+        cols = matrix[:, top_idx].toarray().astype(bool)
+
+        # Add edges based on Jaccard similarity. Pack each artist's festival
+        # vector into a uint64 bitset row: one AND plus popcount then covers 64
+        # festivals per word. The transpose is an F-ordered view and packbits
+        # keeps that layout, so copy to C order first - the uint64 view below
+        # needs a contiguous last axis once the data spans more than one word
         logger.info(f"Calculating Jaccard similarity for {len(top_artists)} artists")
-        for i, artist_a in enumerate(top_artists):
-            a_values = df[artist_a].sparse.to_dense().values
-            for j in range(i + 1, len(top_artists)):
-                artist_b = top_artists[j]
-                b_values = df[artist_b].sparse.to_dense().values
-                sim = jaccard_score(a_values, b_values)
-                if sim >= min_similarity:
-                    G.add_edge(artist_a, artist_b, weight=sim)
+        packed = np.packbits(np.ascontiguousarray(cols.T), axis=1)
+        pad = -packed.shape[1] % 8
+        if pad:
+            packed = np.pad(packed, ((0, 0), (0, pad)))
+        bits = packed.view(np.uint64)
+        counts = cols.sum(axis=0).astype(np.int64)
+        if NUMBA_AVAILABLE:
+            # The JIT-compiled kernel does all pairs in one parallel call
+            sims = _jaccard_matrix(bits, counts)
+        else:
+            inter = np.bitwise_count(bits[:, None, :] & bits[None, :, :]).sum(
+                axis=2, dtype=np.int64
+            )
+            union = counts[:, None] + counts[None, :] - inter
+            sims = np.where(union > 0, inter / union, 0.0)
+
+        # Add edges for sufficiently similar pairs, upper triangle only
+        for i, j in np.argwhere(np.triu(sims >= min_similarity, k=1)):
+            G.add_edge(top_artists[i], top_artists[j], weight=float(sims[i, j]))
 
         # Remove isolated nodes
         if remove_isolated_nodes:
@@ -366,35 +553,37 @@ class FestivalRecommender:
         if not self.festivals:
             raise ValueError("Festival data is empty. Run mine_rules() first.")
 
-        logger.info(
-            f"Building binary artist–festival matrix with {len(self.festivals)} festivals"
-        )
-        df = (
-            pd.DataFrame(
-                [{a: 1 for a in lineup} for lineup in self.festivals.values()],
-                index=self.festival_names,
-            )
-            .fillna(0)
-            .astype("Sparse[int]")
-        )
+        # Build the inverted index if missing, e.g. for recommenders pickled before
+        # the index existed
+        if not getattr(self, "_artist_festivals", None):
+            self._build_artist_index()
 
-        if artist not in df.columns:
+        if artist not in self._artist_festivals:
             raise ValueError(f"Artist '{artist}' not found in dataset.")
 
-        top_artists = (
-            df.sum(axis=0).sort_values(ascending=False).head(top_n).index.tolist()
+        artist_festivals = self._artist_festivals[artist]
+
+        # Only artists sharing at least one festival can have a non-zero similarity,
+        # so there is no need to scan the whole artist catalogue
+        candidates = set().union(
+            *(set(self.festivals[festival]) for festival in artist_festivals)
         )
-        top_artists = [a for a in top_artists if a != artist]
+        candidates.discard(artist)
 
-        a_values = df[artist].sparse.to_dense().values
-        similar = []
+        # Restrict to the most frequently appearing candidates
+        candidates = sorted(
+            candidates, key=lambda a: len(self._artist_festivals[a]), reverse=True
+        )[:top_n]
 
         logger.info(
-            f"Calculating Jaccard similarity for {len(top_artists)} artists vs '{artist}'"
+            f"Calculating Jaccard similarity for {len(candidates)} artists vs '{artist}'"
         )
-        for other in top_artists:
-            b_values = df[other].sparse.to_dense().values
-            sim = jaccard_score(a_values, b_values)
+        similar = []
+        for other in candidates:
+            other_festivals = self._artist_festivals[other]
+            sim = len(artist_festivals & other_festivals) / len(
+                artist_festivals | other_festivals
+            )
             if sim >= min_similarity:
                 similar.append((other, sim) if return_scores else other)
 
@@ -6,6 +6,7 @@
 import re
 
 import arrow
+from joblib import Memory
 import matplotlib.dates as mdates
 import matplotlib.lines as mlines
 import matplotlib.pyplot as plt
@@ -20,11 +21,30 @@ years_backwards_timeline = 15  # How many years backwards to plot
 years_forwards_timeline = 8  # How many years forwards to plot
 recency_threshold = 10  # How many years back last release must be to be included
 
+# %% FUNCTIONS AND SUCH
+# Cache the parsed album lookups on disk, so rerunning the notebook does not
+# redo the MusicBrainz requests and parsing. Delete the cache dir to invalidate
+memory = Memory("../../data/.cache", verbose=0)
+get_artist_albums = memory.cache(get_artist_albums)
+
+# Titles of likely rereleases usually contain one of these words. Compile the
+# alternation once instead of building a regex per album and type
+remove_types = ["instrumental", "revisited"]
+regex_rereleases = re.compile(r"\b(?:" + "|".join(remove_types) + r")\b", re.IGNORECASE)
+
 # %% GET DATA
 # Get bands from csv (or any other source)
 bands_path = "../../data/bands.csv"
-artists_df = pd.read_csv(bands_path, delimiter=";")
-artists = artists_df["Band"].to_list()[:25]  # Just the first so many
+artists_df = pd.read_csv(bands_path, delimiter=";", usecols=["Band"])
+
+# Drop duplicate bands before slicing - every duplicate costs a full scrape.
+# Keep the first spelling of each name, compared case-insensitively
+seen = {}
+for artist in artists_df["Band"]:
+    seen.setdefault(artist.strip().lower(), artist.strip())
+if len(seen) < len(artists_df):
+    print(f"Removed {len(artists_df) - len(seen)} duplicate bands")
+artists = list(seen.values())[:25]  # Just the first so many
 
 # Get releases for a number of artists
 releases = {}
@@ -34,16 +54,10 @@ for artist in artists:
 
     # Remove some likely rereleases. This can usually be found by filtering the title
     # of the release and is a best effort to remove rereleases
-    remove_types = ["instrumental", "revisited"]
     albums = [
         album
         for album in albums
-        if not any(
-            re.search(
-                rf".*\s.*\b{remove_type}\b.*", album.get("album_title"), re.IGNORECASE
-            )
-            for remove_type in remove_types
-        )
+        if not regex_rereleases.search(album.get("album_title") or "")
     ]
 
     # Keep only first release of each album name
@@ -78,19 +92,14 @@ for artist in artists:
     # Base prediction on last 5 releases
     last_releases = release_dates[-5:]
 
-    # Calculate metrics of release times
-    minimum = np.min([
-        last_releases[i + 1] - last_releases[i] for i in range(len(last_releases) - 1)
-    ]).days
-    maximum = np.max([
-        last_releases[i + 1] - last_releases[i] for i in range(len(last_releases) - 1)
-    ]).days
-    median = np.median([
-        last_releases[i + 1] - last_releases[i] for i in range(len(last_releases) - 1)
-    ]).days
-    average = np.mean([
-        last_releases[i + 1] - last_releases[i] for i in range(len(last_releases) - 1)
-    ]).days
+    # Calculate metrics of release times, from the gaps between consecutive
+    # releases in days, computed once for all four metrics
+    timestamps = np.array([release.float_timestamp for release in last_releases])
+    gaps_days = np.diff(timestamps) / 86400.0
+    minimum = gaps_days.min()
+    maximum = gaps_days.max()
+    median = np.median(gaps_days)
+    average = gaps_days.mean()
 
     # Calculate expected next release date
     next_release_minimum = max(last_releases).shift(days=minimum)
@@ -107,9 +116,14 @@ for artist in artists:
         print(f"Next release prediction too far in the future for {artist}, skipping")
         continue
 
-    # Add to releases
+    # Add to releases. The dates also go in as a datetime64 array, so the plot
+    # below can hand matplotlib one array per artist instead of converting the
+    # arrow objects one by one on every draw
     releases[artist] = {
         "release_dates": release_dates,
+        "release_dates_np": np.array(
+            [release.naive for release in release_dates], dtype="datetime64[us]"
+        ),
         "release_count": len(release_dates),
         "minimum_release_time": minimum,
         "maximum_release_time": maximum,
@@ -140,10 +154,12 @@ artist_positions = {artist: i for i, artist in enumerate(releases.keys())}
 # Plot each artist's timeline
 for artist, info in releases.items():
     y = artist_positions[artist]
-    dates = [dt.datetime for dt in info["release_dates"]]
+    dates = info["release_dates_np"]
 
     # Plot release dates and lines
-    ax.plot(dates, [y] * len(dates), "o-", color="black", linewidth=1, markersize=5)
+    ax.plot(
+        dates, np.full(len(dates), y), "o-", color="black", linewidth=1, markersize=5
+    )
 
     # Plot expected next release prediction range
     dates = [
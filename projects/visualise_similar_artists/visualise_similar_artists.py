@@ -14,6 +14,8 @@
 # manually.
 
 # %% IMPORTS
+from concurrent.futures import ThreadPoolExecutor
+
 from adjustText import adjust_text
 from matplotlib import ticker
 import matplotlib.pyplot as plt
@@ -44,11 +46,26 @@ artist_listener_count = get_lastfm_listener_count(
     artist_name=artist_name, lastfm_api_key=lastfm_api_key
 )
 
-# Get listener count for each similar artist
-for artist in tqdm(similar_artists, desc="Getting listener counts"):
-    artist["listener_count"] = int(
-        get_lastfm_listener_count(artist["name"], lastfm_api_key=lastfm_api_key)
+# Get listener count for each similar artist. The lookups are independent and
+# I/O bound, so a small thread pool overlaps the waiting instead of paying each
+# request's latency and backoff in sequence
+with ThreadPoolExecutor(max_workers=8) as executor:
+    listener_counts = list(
+        tqdm(
+            executor.map(
+                lambda artist: int(
+                    get_lastfm_listener_count(
+                        artist["name"], lastfm_api_key=lastfm_api_key
+                    )
+                ),
+                similar_artists,
+            ),
+            total=len(similar_artists),
+            desc="Getting listener counts",
+        )
     )
+for artist, listener_count in zip(similar_artists, listener_counts, strict=True):
+    artist["listener_count"] = listener_count
 df = pd.DataFrame(similar_artists)
 
 # %% PREPARE DATA
@@ -61,16 +78,16 @@ plt.figure(figsize=(12, 12))
 ax = sns.scatterplot(data=plot_df, x="listener_count", y="similarity", color="black")
 ax.set_xscale("log")
 
-# Add artist names as labels
+# Add artist names as labels. Pull the columns out as arrays once - iterrows
+# builds a whole Series object per row just to read three values from it
 texts = [
-    ax.text(
-        row["listener_count"],
-        row["similarity"],
-        row["name"],
-        fontsize=13,
-        color="black",
+    ax.text(x, y, name, fontsize=13, color="black")
+    for x, y, name in zip(
+        plot_df["listener_count"].to_numpy(),
+        plot_df["similarity"].to_numpy(),
+        plot_df["name"].to_numpy(),
+        strict=True,
     )
-    for _, row in plot_df.iterrows()
 ]
 adjust_text(texts, arrowprops=dict(arrowstyle="-", color="gray"))
 
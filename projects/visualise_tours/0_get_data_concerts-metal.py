@@ -6,13 +6,12 @@
 # The results are saved to a csv file
 
 # %% IMPORTS
+from concurrent.futures import ThreadPoolExecutor
 import re
 from time import sleep
 
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.by import By
+import requests
 from tqdm import tqdm
 
 from functions.scraping import get_lastfm_listener_count, get_similar_artists
@@ -34,24 +33,36 @@ with open(lastfm_api_key_path, encoding="utf-8") as f:
     lastfm_api_key = f.read()
 
 # %% FUNCTIONS AND SUCH
-# Regex for parsing texts on artist page
+# Regex for parsing the concert lines on an artist page. One finditer pass over
+# the events section replaces splitting on <br> and matching line by line
 regex_concert = re.compile(
     r"""
-    ^                               # Start of string 
-    (?P<date>.+)                    # Date in DD/MM/YYYY format, alternatively \d{2}/\d{2}/\d{4}
+    (?P<date>\d{2}/\d{2}/\d{4})     # Date in DD/MM/YYYY format
     \s<span\sclass="flag\sflag\-    # HTML junk
-    (?P<country>.+)                 # Country code
+    (?P<country>[^"]+)              # Country code
     "></span>\s<a\stitle="          # HTML junk
-    (?P<event_name>.+)              # Event name
-    "\shref=".*@\s                  # HTML junk
-    (?P<city>.+)                    # City
+    (?P<event_name>[^"]+)           # Event name
+    "\shref="[^>]*>.*?@\s           # HTML junk up to the @ before the location
+    (?P<city>[^,]+)                 # City
     ,\s                             # Comma separating city and venue
-    (?P<venue>.+)                   # Venue
-    $                               # End of string
+    (?P<venue>.+?)                  # Venue
+    (?=<br)                         # Runs up to the next line break
     """,
     re.VERBOSE | re.IGNORECASE,
 )
 
+# Regex for parsing the rows of a selection page in one pass, instead of a chain
+# of splits allocating intermediate strings per artist. The events count sits in
+# the last link of the row
+regex_artist_match = re.compile(
+    r"""
+    flag\sflag-(?P<country>[^"]+)"></span>\s*              # Country code
+    <a\shref="(?P<href>[^"]+)">(?P<artist_name>[^<]+)</a>  # Artist page link and name
+    .*?<a[^>]*>(?P<events_n>\d+)</a>                       # Number of events
+    """,
+    re.VERBOSE | re.IGNORECASE | re.DOTALL,
+)
+
 # %% GET DATA
 # Get bands from csv (or any other source)
 # Get similar artists
@@ -59,63 +70,63 @@ similar_artists = get_similar_artists(
     artist_name=artist_name, limit=artists_similar_n, lastfm_api_key=lastfm_api_key
 )
 
-# Get listener count for each similar artist
-for artist in tqdm(similar_artists, desc="Getting listener counts"):
-    artist["listener_count"] = int(
-        get_lastfm_listener_count(artist["name"], lastfm_api_key=lastfm_api_key)
+# Get listener count for each similar artist. The lookups are independent and
+# I/O bound, so a small thread pool overlaps the waiting instead of paying each
+# request's latency and backoff in sequence
+with ThreadPoolExecutor(max_workers=8) as executor:
+    listener_counts = list(
+        tqdm(
+            executor.map(
+                lambda artist: int(
+                    get_lastfm_listener_count(
+                        artist["name"], lastfm_api_key=lastfm_api_key
+                    )
+                ),
+                similar_artists,
+            ),
+            total=len(similar_artists),
+            desc="Getting listener counts",
+        )
     )
+for artist, listener_count in zip(similar_artists, listener_counts, strict=True):
+    artist["listener_count"] = listener_count
 
 # Get first X similar artists by listener count
 similar_artists.sort(key=lambda x: x["listener_count"], reverse=True)
 artists = [artist["name"] for artist in similar_artists[:artists_listener_top_n]]
 artists.append(artist_name)  # Add the artist of interest as a reference
 
-# Start browser
-driver = webdriver.Chrome()
+# The pages are static HTML behind a GET search form, so a plain session with
+# keep-alive replaces the whole browser - no Chrome startup, no JS, no waiting
+# for renders
+session = requests.Session()
 
 concerts = []
 for artist in tqdm(artists, desc="Getting concerts"):
-    # Go to search page and search for the artist
-    driver.get(base_url)
-    sleep(2)  # Wait for page to load and don't hammer the server
-
-    # Locate text input, clear and fill with artist name
-    text_input = driver.find_element(By.XPATH, '//*[@id="search"]')
-    driver.find_element(By.XPATH, '//*[@id="search"]').clear()
-    ActionChains(driver).send_keys_to_element(text_input, artist).perform()
-    driver.find_element(
-        By.XPATH, "/html/body/main/div/div[1]/div/form/div/div[5]/input"
-    ).click()
-    sleep(2)  # Wait for page to load and don't hammer the server
-
-    # Test the kind of page - if it is a selection page, choose best match and go to url
-    if driver.find_elements(By.XPATH, "/html/body/main/div/h1"):
+    # Submit the search form directly with the artist as query parameter
+    html_text = session.get(base_url, params={"search": artist}, timeout=30).text
+    sleep(2)  # Don't hammer the server
+
+    # Test the kind of page - an artist page has a Last events section, anything
+    # else is a selection page, so choose best match and get its url
+    if "<h2>Last events</h2>" not in html_text:
         # Check if there are actually any results at all, otherwise skip
-        if not driver.find_elements(By.XPATH, "/html/body/main/div/div[2]/table/tbody"):
+        if "<tbody>" not in html_text:
             print(f"No page found for {artist}, skipping")
             continue
         print(f"Redirected to a selection page for {artist}")
 
         # Get suggested matches and find best match for search
-        table_html = driver.find_element(
-            By.XPATH, "/html/body/main/div/div[2]/table/tbody"
-        ).get_attribute("innerHTML")
-        artist_texts = table_html.split('<tr><td><span class="flag flag-')[1:]
-
-        artist_matches = []
-        for artist_text in artist_texts:
-            # Use some splitting tricks to parse the text - regex is too verbose for this
-            country_childurl, *_, kind_events_n, _ = artist_text.split("</a>")
-            country = country_childurl.split('"')[0]
-            artist_name = country_childurl.split('.html">')[1]
-            events_n = kind_events_n.split('.html">')[-1]
-            url = "https://en.concerts-metal.com/" + country_childurl.split('"')[2]
-            artist_matches.append({
-                "country": country,
-                "artist_name": artist_name,
-                "events_n": int(events_n),
-                "url": url,
-            })
+        table_html = html_text.split("<tbody>")[1].split("</tbody>")[0]
+        artist_matches = [
+            {
+                "country": match["country"],
+                "artist_name": match["artist_name"],
+                "events_n": int(match["events_n"]),
+                "url": "https://en.concerts-metal.com/" + match["href"],
+            }
+            for match in regex_artist_match.finditer(table_html)
+        ]
 
         # Try find exact match for artist, give preference to artist with most events
         artist_matches.sort(key=lambda x: x["events_n"], reverse=True)
@@ -134,26 +145,18 @@ for artist in tqdm(artists, desc="Getting concerts"):
             )
 
         # Go!
-        driver.get(artist_url)
-        sleep(2)  # Wait for page to load and don't hammer the server
-
-    # Get a plaintext version of the page - this makes parsing a million times easier
-    html_text = driver.page_source
+        html_text = session.get(artist_url, timeout=30).text
+        sleep(2)  # Don't hammer the server
 
-    # The business part is from the h2 Last events tag, up to the first <br></div> combination
-    # Then split by <br>, which is the next line
-    concerts_texts = (
-        html_text.split("<h2>Last events</h2>")[1].split("<br></div>")[0].split("<br>")
+    # The business part is from the h2 Last events tag, up to the first <br></div>
+    # combination. The trailing <br> is put back so the last line terminates too
+    events_html = (
+        html_text.split("<h2>Last events</h2>")[1].split("<br></div>")[0] + "<br>"
     )
 
-    # Add details of concert
-    for concert_text in concerts_texts:
-        # Use regex to parse the texts and add details to concerts list
-        concert_details = regex_concert.match(concert_text).groupdict()
-        concerts.append({**{"artist": artist}, **concert_details})
-
-# Close browser
-driver.quit()
+    # Add details of each concert in the section in one regex pass
+    for match in regex_concert.finditer(events_html):
+        concerts.append({**{"artist": artist}, **match.groupdict()})
 
 # Save to csv for later use
 pd.DataFrame(concerts).to_csv("../../data/concerts.csv", index=False)
@@ -2,15 +2,15 @@
 # Get data from Setlist.fm and save to csv
 
 # %% IMPORTS
-import json
+from concurrent.futures import ThreadPoolExecutor
 from math import ceil
 
 import arrow
+import orjson
 import pandas as pd
 from tqdm import tqdm
 
 from functions.scraping import get_setlists
-from functions.utils import get_parsed_date
 
 # %% INPUT
 years_back = 10
@@ -20,15 +20,18 @@ setlistfm_api_key_path = "../../data/credentials/setlistfm_api_key.txt"
 with open(setlistfm_api_key_path, encoding="utf-8") as f:
     setlistfm_api_key = f.read()
 
-# %% GET DATA
-# Get bands from csv (or any other source)
-bands_path = "../../data/bands.csv"
-artists_df = pd.read_csv(bands_path, delimiter=";")
-artists = artists_df["Band"].to_list()[:30]  # Just the first so many
 
-# Collect setlists
-setlists = []
-for artist in tqdm(artists, desc="Getting setlists"):
+# %% FUNCTIONS AND SUCH
+def get_artist_setlists(artist: str) -> list:
+    """Get all recent enough setlists for one artist, page by page.
+
+    Args:
+        artist (str): The name of the artist.
+
+    Returns:
+        list: The artist's setlists, most recent first.
+    """
+    setlists = []
     page = 1  # Start from page 1
     while True:
         artist_setlists = get_setlists(artist, setlistfm_api_key, page=page)
@@ -38,18 +41,51 @@ for artist in tqdm(artists, desc="Getting setlists"):
         if page == ceil(artist_setlists["total"] / 20):
             break
 
-        # Break if earliest retrieved setlist is from before threshold year
-        earliest_year = min([
-            get_parsed_date(setlist["eventDate"]).year
-            for setlist in artist_setlists["setlist"]
-        ])
+        # Break if earliest retrieved setlist is from before threshold year.
+        # eventDate is a DD-MM-YYYY string, so the year is just its last four
+        # characters - no need for full date parsing on this early-break check
+        earliest_year = min(
+            int(setlist["eventDate"][-4:]) for setlist in artist_setlists["setlist"]
+        )
         if earliest_year < arrow.now().year - years_back:
             break
 
         page += 1
+    return setlists
+
+
+# %% GET DATA
+# Get bands from csv (or any other source)
+bands_path = "../../data/bands.csv"
+artists_df = pd.read_csv(bands_path, delimiter=";", usecols=["Band"])
+
+# Drop duplicate bands before slicing - every duplicate costs a full page chain.
+# Keep the first spelling of each name, compared case-insensitively
+seen = {}
+for artist in artists_df["Band"]:
+    seen.setdefault(artist.strip().lower(), artist.strip())
+if len(seen) < len(artists_df):
+    print(f"Removed {len(artists_df) - len(seen)} duplicate bands")
+artists = list(seen.values())[:30]  # Just the first so many
 
-# Save to json for later use
-with open("../../data/setlists.json", "w", encoding="utf-8") as f:
-    json.dump(setlists, f)
+# Collect setlists. The artists are independent and the page requests are I/O
+# bound, so a small thread pool overlaps the waiting instead of serialising all
+# page chains behind each other. The setlists are streamed to a JSONL file one
+# line per setlist as artists finish, instead of accumulating everything in
+# memory and dumping one huge JSON array at the end - memory stays flat and
+# finished artists survive a crash
+with (
+    open("../../data/setlists.jsonl", "w", encoding="utf-8") as f_out,
+    ThreadPoolExecutor(max_workers=8) as executor,
+):
+    for artist_setlists in tqdm(
+        executor.map(get_artist_setlists, artists),
+        total=len(artists),
+        desc="Getting setlists",
+    ):
+        for setlist in artist_setlists:
+            # orjson serialises several times faster than the stdlib json
+            f_out.write(orjson.dumps(setlist).decode() + "\n")
+        f_out.flush()
 
 # %%
@@ -5,6 +5,7 @@
 import arrow
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
+import orjson
 import pandas as pd
 import pycountry_convert as pc
 
@@ -12,36 +13,76 @@ import pycountry_convert as pc
 artist_name = "Aephanemer"  # The artist to use as a reference
 min_tour_concerts = 6  # Minimum number of concerts to constitute a tour
 years_back = 10  # How many years back to look for concerts
+data_source = "concerts-metal"  # Where the concerts come from, or "setlistfm"
 
-# %% GET DATA
-df = pd.read_csv("../../data/concerts.csv")[["artist", "date", "event_name", "country"]]
 
-# Cast types, add continent and sort
-df["date"] = pd.to_datetime(df["date"], format="%d/%m/%Y")
-df["continent"] = df["country"].apply(
-    lambda x: pc.country_alpha2_to_continent_code(x.upper())
-)
+# %% FUNCTIONS AND SUCH
+def get_continent_code(country_code: str) -> str | None:
+    """Get the continent code for a two-letter country code.
+
+    Args:
+        country_code (str): The ISO alpha-2 country code, upper case.
+
+    Returns:
+        str | None: The continent code, or None when the code is unknown.
+    """
+    try:
+        return pc.country_alpha2_to_continent_code(country_code)
+    except KeyError:
+        return None
+
+
+# %% GET DATA
+if data_source == "setlistfm":
+    # Read the JSONL checkpoint and flatten the nested setlists with one
+    # json_normalize call, instead of pulling the keys out per setlist in Python
+    with open("../../data/setlists.jsonl", "rb") as f:
+        setlists = [orjson.loads(line) for line in f]
+    df = pd.json_normalize(setlists, sep=".")[
+        ["artist.name", "eventDate", "tour.name", "venue.city.country.code"]
+    ]
+    df.columns = ["artist", "date", "event_name", "country"]
+    # Setlists outside a tour cannot be grouped into one
+    df = df.dropna(subset=["event_name"])
+    df["date"] = pd.to_datetime(df["date"], format="%d-%m-%Y")
+else:
+    # Only parse the needed columns, and land the repetitive string columns as
+    # categoricals straight from the reader instead of materialising the full
+    # csv first
+    df = pd.read_csv(
+        "../../data/concerts.csv",
+        usecols=["artist", "date", "event_name", "country"],
+        dtype={"artist": "category", "event_name": "category", "country": "category"},
+    )
+    df["date"] = pd.to_datetime(df["date"], format="%d/%m/%Y")
+
+# Add continent and sort. There are only a couple hundred country codes at most,
+# so look each unique one up once and map, instead of converting per concert row.
+# Unknown codes become None and fall back to the grey plot colour below
+countries = df["country"].str.upper()
+continent_map = {code: get_continent_code(code) for code in countries.unique()}
+df["continent"] = countries.map(continent_map)
 df = df.sort_values(["artist", "date"], ascending=True)
 
-# Remove events that have less than X concerts in total per artist
-counts = df.groupby(["artist", "event_name"]).size().reset_index(name="count")
-valid_combinations = counts[counts["count"] >= min_tour_concerts][
-    ["artist", "event_name"]
-]
-df = df.merge(valid_combinations, on=["artist", "event_name"], how="inner")
+# Cast the string columns to categoricals, so the groupbys below hash small
+# integer codes instead of Python strings, and the columns take less memory.
+# The groupbys then need observed=True to not expand to every unused combination
+for col in ["artist", "event_name", "country", "continent"]:
+    df[col] = df[col].astype("category")
 
-# Get most common continent for each tour
+# Get most common continent for each tour, by sizing the per-continent groups
+# and keeping the biggest per tour - mode() ran as a Python call per group
 most_common_continent = (
-    df.groupby(["artist", "event_name"])["continent"]
-    .agg(
-        lambda x: x.mode().iloc[0]
-    )  # mode() returns a Series; take the first if there's a tie
-    .reset_index()
+    df.groupby(["artist", "event_name", "continent"], observed=True)
+    .size()
+    .reset_index(name="size")
+    .sort_values(["size", "continent"], ascending=[False, True])
+    .drop_duplicates(["artist", "event_name"])[["artist", "event_name", "continent"]]
 )
 
 # Get first concert and number of events for each artist and tour
 first_concert_date = (
-    df.groupby(["artist", "event_name"])["date"]
+    df.groupby(["artist", "event_name"], observed=True)["date"]
     .agg(first_concert="min", events_n="count")
     .reset_index()
 )
@@ -51,14 +92,26 @@ df_agg = pd.merge(
     first_concert_date, most_common_continent, on=["artist", "event_name"]
 )
 
+# Remove events that have less than X concerts in total per artist. The concert
+# count already sits in the aggregate, so the earlier separate groupby plus
+# merge back onto the raw rows is not needed
+df_agg = df_agg[df_agg["events_n"] >= min_tour_concerts]
+
 # Only keep tours that started in the last so many years
 df_agg = df_agg[df_agg["first_concert"].dt.year >= arrow.now().year - years_back]
 
-# Replace year for 2000 for easier plotting
-df_agg["first_concert"] = df_agg["first_concert"].apply(lambda x: x.replace(year=2000))
+# Replace year for 2000 for easier plotting. Assembling the dates from their
+# components stays vectorised, where replace() went through a Python call per row
+df_agg["first_concert"] = pd.to_datetime({
+    "year": 2000,
+    "month": df_agg["first_concert"].dt.month,
+    "day": df_agg["first_concert"].dt.day,
+})
 
-# Get starting counts for legend
+# Get starting counts for legend. Categorical value_counts also lists the
+# continents without any tours left, so drop those
 continent_counts = df_agg["continent"].value_counts()
+continent_counts = continent_counts[continent_counts > 0]
 
 # Assign y-axis positions
 artists_ordered = df_agg["artist"].drop_duplicates().tolist()